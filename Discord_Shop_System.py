@@ -1,37 +1,67 @@
+import sys
+from startup_profile import StartupProfiler
+# Created first so --profile-startup can time every import below
+PROFILER = StartupProfiler.from_argv(sys.argv)
 import os
 import json
-import sys
+import asyncio
 import hmac
 import hashlib
 import threading
-from flask import Flask, request, jsonify
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
+from discord.ui import Select, View, Button
 from dotenv import load_dotenv
 from mcrcon import MCRcon
 from aiolimiter import AsyncLimiter
-import pymysql
+from log_publisher import LogPublisher
+from chat_ingest import ChatCommandRouter, ChatPoller
+from presence import PresenceTracker
 
 # Load environment
-load_dotenv()
+with PROFILER.phase('load .env'):
+    load_dotenv()
 
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 SHOP_LOG_CHANNEL_ID = int(os.getenv("SHOP_LOG_CHANNEL_ID", 0))
 REWARD_INTERVAL_MINUTES = int(os.getenv("REWARD_INTERVAL_MINUTES", 30))
 REWARD_POINTS = int(os.getenv("REWARD_POINTS", 10))
+# "interval": REWARD_POINTS per online player each cycle; "minutes": REWARD_POINTS_PER_MINUTE per minute online
+REWARD_MODE = os.getenv("REWARD_MODE", "interval").lower()
+REWARD_POINTS_PER_MINUTE = int(os.getenv("REWARD_POINTS_PER_MINUTE", 1))
+PRESENCE_POLL_SECONDS = float(os.getenv("PRESENCE_POLL_SECONDS", 60))
 TIP4SERV_SECRET = os.getenv("TIP4SERV_SECRET", "")
 TIP4SERV_TOKEN = os.getenv("TIP4SERV_TOKEN", "")
+LOG_FLUSH_SECONDS = float(os.getenv("LOG_FLUSH_SECONDS", 5))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", 25))
+LOG_SPILL_PATH = os.getenv("LOG_SPILL_PATH", "shop_log_spill.jsonl")
+# Seconds between GetChat polls of each RCON server; 0 disables in-game chat commands
+CHAT_POLL_SECONDS = float(os.getenv("CHAT_POLL_SECONDS", 5))
+
+# In-game replies and command names; override any key with SHOP_MESSAGES='{"HavePoints": "..."}'
+MESSAGES = {
+    "Sender": "WrecksShop",
+    "PointsCmd": "/points",
+    "TradeCmd": "/trade",
+    "HavePoints": "You have {} points.",
+    "NoPoints": "You don't have enough points.",
+    "CantGivePoints": "You can't trade points with yourself.",
+    "SentPoints": "Sent {} points to {}.",
+    "GotPoints": "Received {} points from {}.",
+}
+MESSAGES.update(json.loads(os.getenv("SHOP_MESSAGES", "{}")))
+
+# Shop logic reads RCON settings from the environment at import time
+from shop_logic import (RCON_HOST, RCON_PORT, RCON_PASSWORD, connect_databases,
+                        get_balance, log_transaction, queue_delivery, deliver_queued_items)
 
 # Parse multiple MariaDB configs from env
 # Expected JSON: [{"name":"primary","host":"...","port":3306,"user":"...","password":"...","database":"..."}, ...]
 DB_CONFIGS = json.loads(os.getenv("SQL_DATABASES", "[]"))
-# Create connections
-db_conns = {}
-for cfg in DB_CONFIGS:
-    db_conns[cfg["name"]] = pymysql.connect(host=cfg["host"], port=int(cfg["port"]),
-                                             user=cfg["user"], password=cfg["password"],
-                                             database=cfg["database"], autocommit=True)
+# Register connections; each one is opened on first use
+with PROFILER.phase('register databases'):
+    connect_databases(DB_CONFIGS)
 
 # Rate limiter for webhooks: e.g., 5 req per second
 webhook_limiter = AsyncLimiter(5, 1)
@@ -39,75 +69,37 @@ webhook_limiter = AsyncLimiter(5, 1)
 # RCON settings
 RCON_SERVERS = json.loads(os.getenv("RCON_SERVERS", "[]"))
 
-# ===== Database Helpers =====
-def get_cursor(db_name="primary"):    
-    return db_conns[db_name].cursor()
-
-def get_balance(player_id, db_name="primary"):
-    cur = get_cursor(db_name)
-    cur.execute("SELECT COALESCE(SUM(points),0) FROM transactions WHERE player_id=%s", (player_id,))
-    bal = cur.fetchone()[0]
-    cur.close()
-    return bal
-
-def log_transaction(player_id, points, status, source="shop", db_name="primary"):
-    cur = get_cursor(db_name)
-    cur.execute(
-        "INSERT INTO transactions (player_id, points, status, source) VALUES (%s,%s,%s,%s)",
-        (player_id, points, status, source)
-    )
-    cur.close()
-    return get_balance(player_id, db_name)
-
-def queue_delivery(player_id, item_name, command, map_name, price, db_name="primary"):
-    cur = get_cursor(db_name)
-    cur.execute(
-        "INSERT INTO pending_deliveries (player_id, item_name, command, map, price) VALUES (%s,%s,%s,%s,%s)",
-        (player_id, item_name, command, map_name, price)
-    )
-    cur.close()
-
-def deliver_queued_items(db_name="primary"):
-    cur = get_cursor(db_name)
-    cur.execute("SELECT id, player_id, command FROM pending_deliveries WHERE status='pending'")
-    rows = cur.fetchall(); count = 0
-    for id_, pid, cmd in rows:
-        try:
-            with MCRcon(RCON_HOST, RCON_PASSWORD, port=RCON_PORT) as mcr:
-                mcr.command(cmd)
-            cur.execute("UPDATE pending_deliveries SET status='delivered' WHERE id=%s", (id_,))
-            count += 1
-        except:
-            continue
-    cur.close()
-    return count
-
 # ===== Flask Webhook =====
-app = Flask(__name__)
-
-@app.route('/tip4serv-webhook', methods=['POST'])
-async def tip4serv_webhook():
-    async with webhook_limiter:
-        signature = request.headers.get('X-Tip4Serv-Signature','')
-        body = request.get_data()
-        if TIP4SERV_SECRET:
-            mac = hmac.new(TIP4SERV_SECRET.encode(), body, hashlib.sha256).hexdigest()
-            if not hmac.compare_digest(mac, signature):
-                return jsonify({'error':'Invalid signature'}), 403
-        data = request.json or {}
-        player_id = data.get('eos_id') or data.get('player_id')
-        points = int(data.get('points',0))
-        log_channel = bot.get_channel(SHOP_LOG_CHANNEL_ID)
-        if not player_id or points<=0:
-            if log_channel: await log_channel.send(f"❌ Invalid webhook payload: {data}")
-            return jsonify({'error':'Invalid data'}), 400
-        # Credit
-        new_bal = log_transaction(player_id, points, 'Success', source='tip4serv')
-        if log_channel: await log_channel.send(f"💸 Tip4Serv: +{points} points to {player_id} (now {new_bal})")
-        return jsonify({'status':'ok','balance':new_bal}), 200
-
-# Run Flask in background
-threading.Thread(target=lambda: app.run(host='0.0.0.0', port=8080), daemon=True).start()
+def create_webhook_app():
+    # Flask is imported on the webhook thread so it does not delay bot startup
+    from flask import Flask, request, jsonify
+    app = Flask(__name__)
+
+    @app.route('/tip4serv-webhook', methods=['POST'])
+    async def tip4serv_webhook():
+        async with webhook_limiter:
+            signature = request.headers.get('X-Tip4Serv-Signature','')
+            body = request.get_data()
+            if TIP4SERV_SECRET:
+                mac = hmac.new(TIP4SERV_SECRET.encode(), body, hashlib.sha256).hexdigest()
+                if not hmac.compare_digest(mac, signature):
+                    return jsonify({'error':'Invalid signature'}), 403
+            data = request.json or {}
+            player_id = data.get('eos_id') or data.get('player_id')
+            points = int(data.get('points',0))
+            if not player_id or points<=0:
+                shop_log.publish("error", f"Invalid webhook payload: {data}")
+                return jsonify({'error':'Invalid data'}), 400
+            # Credit
+            new_bal = log_transaction(player_id, points, 'Success', source='tip4serv')
+            shop_log.publish("tip4serv", f"+{points} points to {player_id} (now {new_bal})")
+            return jsonify({'status':'ok','balance':new_bal}), 200
+
+    return app
+
+# Run Flask in background (skipped when only profiling startup)
+if not PROFILER.enabled:
+    threading.Thread(target=lambda: create_webhook_app().run(host='0.0.0.0', port=8080), daemon=True).start()
 
 # ===== Discord Bot =====
 intents = discord.Intents.default()
@@ -115,30 +107,76 @@ intents.message_content = True
 bot = commands.Bot(command_prefix='/', intents=intents)
 bot.temp_purchases = {}
 
+# Log channel publisher: queues events and flushes them as batched embeds on the bot loop
+shop_log = LogPublisher(lambda: bot.get_channel(SHOP_LOG_CHANNEL_ID), spill_path=LOG_SPILL_PATH,
+                        flush_interval=LOG_FLUSH_SECONDS, batch_size=LOG_BATCH_SIZE)
+
 # RCON env
 RCON_HOSTS = RCON_SERVERS  # GUI populates this in .env
-RCON_HOST = os.getenv('RCON_HOST','127.0.0.1')
-RCON_PORT = int(os.getenv('RCON_PORT',25575))
-RCON_PASSWORD = os.getenv('RCON_PASSWORD','changeme')
 
-# Reward loop
+# Reward loop: only players seen online by the presence tracker are credited.
+# It reads the state track_presence keeps (and logs joins/leaves for) rather than polling itself.
 @tasks.loop(minutes=REWARD_INTERVAL_MINUTES)
 async def reward_active_players():
-    for guild in bot.guilds:
-        for member in guild.members:
-            if member.bot: continue
-            eos_id = get_balance.__self__(member.id)  # placeholder: implement get_eos_for_discord
-            if not eos_id: continue
-            bal = log_transaction(eos_id, REWARD_POINTS, 'IntervalReward')
-            try:
-                await send_rcon(f"chat {member.display_name} WrecksShop <RichColor Color=\\\"1,1,0,1\\\">+{REWARD_POINTS}! (total {bal})</>")
-            except Exception as e:
-                print(f"[RCON] reward failed: {e}")
+    if REWARD_MODE == "minutes":
+        grants = {eos_id: (name, server, minutes * REWARD_POINTS_PER_MINUTE)
+                  for eos_id, (name, server, minutes) in presence.take_online_minutes().items()}
+    else:
+        grants = {eos_id: (ps.name, ps.server, REWARD_POINTS) for eos_id, ps in presence.online.items()}
+    total = 0
+    for eos_id, (name, server, points) in grants.items():
+        bal = log_transaction(eos_id, points, 'IntervalReward')
+        total += points
+        try:
+            await asyncio.to_thread(rcon_chat, [f"chat {name} WrecksShop <RichColor Color=\\\"1,1,0,1\\\">+{points}! (total {bal})</>"],
+                                    presence.sessions.get(server))
+        except Exception as e:
+            print(f"[RCON] reward failed: {e}")
+    shop_log.publish("reward", f"{total} points to {len(grants)} online players")
 
 @bot.event
 async def on_ready():
     print(f"Logged in as {bot.user}")
-    reward_active_players.start()
+    shop_log.start(bot.loop)
+    if CHAT_POLL_SECONDS > 0 and RCON_SERVERS and not poll_game_chat.is_running():
+        poll_game_chat.start()
+    if RCON_SERVERS and not track_presence.is_running():
+        track_presence.start()
+    if not reward_active_players.is_running():
+        reward_active_players.start()
+
+# ===== Points / trade logic (shared by Discord and in-game chat) =====
+def rcon_chat(lines, session=None):
+    """Send chat lines over a chat-poller session, or the default RCON host when None."""
+    if session is not None:
+        for line in lines: session.command(line)
+        return
+    with MCRcon(RCON_HOST, RCON_PASSWORD, port=RCON_PORT) as mcr:
+        for line in lines: mcr.command(line)
+
+def handle_points(name, eos_id, session=None):
+    points = get_balance(eos_id)
+    rcon_chat([f"chat {name} {MESSAGES['Sender']} " + MESSAGES["HavePoints"].format(points)], session)
+
+def handle_trade(from_name, from_id, to_name, to_id, amount, session=None):
+    if from_id == to_id:
+        return rcon_chat([f"chat {from_name} {MESSAGES['Sender']} " + MESSAGES['CantGivePoints']], session)
+    if get_balance(from_id) < amount:
+        return rcon_chat([f"chat {from_name} {MESSAGES['Sender']} " + MESSAGES['NoPoints']], session)
+    log_transaction(from_id, -amount, "TradeSent", source=f"to:{to_name}")
+    log_transaction(to_id, amount, "TradeReceived", source=f"from:{from_name}")
+    rcon_chat([f"chat {from_name} {MESSAGES['Sender']} " + MESSAGES['SentPoints'].format(amount, to_name),
+               f"chat {to_name} {MESSAGES['Sender']} " + MESSAGES['GotPoints'].format(amount, from_name)], session)
+
+def parse_trade_args(args):
+    """(target_name, amount) from ["name", "amount"], or None if malformed."""
+    if len(args) != 2: return None
+    target_name, amt_str = args
+    try:
+        amount = int(amt_str)
+    except ValueError:
+        return None
+    return (target_name, amount) if amount > 0 else None
 
 # In-game chat handlers
 @bot.event
@@ -150,43 +188,57 @@ async def on_message(message):
     if not eos_id:
         return
     if content == MESSAGES["PointsCmd"]:
-        points = get_balance(eos_id)
         try:
-            with MCRcon(RCON_HOST, RCON_PASSWORD, port=RCON_PORT) as mcr:
-                mcr.command(f"chat {message.author.display_name} {MESSAGES['Sender']} " + 
-                            MESSAGES["HavePoints"].format(points))
+            handle_points(message.author.display_name, eos_id)
         except Exception as e:
             print(f"[RCON] /points error: {e}")
     elif content.startswith(MESSAGES["TradeCmd"]):
-        parts = content.split()
-        if len(parts) != 3: return
-        _, target_name, amt_str = parts
-        try:
-            amount = int(amt_str)
-        except:
-            return
-        if amount <= 0: return
+        parsed = parse_trade_args(content.split()[1:])
+        if not parsed: return
+        target_name, amount = parsed
         from_user, to_user = message.author, discord.utils.get(message.guild.members, name=target_name)
         if not to_user:
             return
-        if from_user.id == to_user.id:
-            with MCRcon(RCON_HOST, RCON_PASSWORD, port=RCON_PORT) as mcr:
-                mcr.command(f"chat {from_user.display_name} {MESSAGES['Sender']} " + MESSAGES['CantGivePoints'])
-            return
         from_id, to_id = get_eos_for_discord(from_user.id), get_eos_for_discord(to_user.id)
         if not from_id or not to_id: return
-        bal = get_balance(from_id)
-        if bal < amount:
-            with MCRcon(RCON_HOST, RCON_PASSWORD, port=RCON_PORT) as mcr:
-                mcr.command(f"chat {from_user.display_name} {MESSAGES['Sender']} " + MESSAGES['NoPoints'])
-            return
-        log_transaction(from_id, -amount, "TradeSent", source=f"to:{to_user.display_name}")
-        log_transaction(to_id, amount, "TradeReceived", source=f"from:{from_user.display_name}")
-        with MCRcon(RCON_HOST, RCON_PASSWORD, port=RCON_PORT) as mcr:
-            mcr.command(f"chat {from_user.display_name} {MESSAGES['Sender']} " + 
-                        MESSAGES['SentPoints'].format(amount, to_user.display_name))
-            mcr.command(f"chat {to_user.display_name} {MESSAGES['Sender']} " + 
-                        MESSAGES['GotPoints'].format(amount, from_user.display_name))
+        handle_trade(from_user.display_name, from_id, to_user.display_name, to_id, amount)
+
+# ===== In-game chat ingestion (RCON GetChat) =====
+async def chat_points(cmd):
+    eos_id = await chat_poller.resolve_player(cmd.server, cmd.player)
+    if not eos_id:
+        return print(f"[CHAT] {cmd.command} refused: no unique online player named {cmd.player} on {cmd.server}")
+    await asyncio.to_thread(handle_points, cmd.player, eos_id, chat_poller.session(cmd.server))
+
+async def chat_trade(cmd):
+    parsed = parse_trade_args(cmd.args)
+    if not parsed: return
+    target_name, amount = parsed
+    from_id = await chat_poller.resolve_player(cmd.server, cmd.player)
+    to_id = await chat_poller.resolve_player(cmd.server, target_name)
+    if not from_id or not to_id:
+        return print(f"[CHAT] {cmd.command} refused: {cmd.player} or {target_name} is not a unique online player on {cmd.server}")
+    await asyncio.to_thread(handle_trade, cmd.player, from_id, target_name, to_id, amount,
+                            chat_poller.session(cmd.server))
+
+chat_poller = ChatPoller(RCON_SERVERS, ChatCommandRouter({MESSAGES["PointsCmd"]: chat_points,
+                                                           MESSAGES["TradeCmd"]: chat_trade}))
+
+@tasks.loop(seconds=CHAT_POLL_SECONDS or 5)
+async def poll_game_chat():
+    await chat_poller.poll_once()
+
+# ===== Presence (RCON ListPlayers) =====
+presence = PresenceTracker(chat_poller.sessions)
+chat_poller.presence = presence
+
+@tasks.loop(seconds=PRESENCE_POLL_SECONDS)
+async def track_presence():
+    diff = await presence.poll_once()
+    for ps in diff.joined:
+        print(f"[PRESENCE] {ps.name} joined {ps.server}")
+    for ps in diff.left:
+        print(f"[PRESENCE] {ps.name} left {ps.server} after {ps.duration / 60:.0f} min")
 
 # Shop UI views
 class ShopCategoryDropdown(Select):
@@ -226,10 +278,12 @@ class MapSelect(Select):
         try:
             send_rcon(cmd)
             log_transaction(player_id, -item['price'], "Success", source=f"buy:{item['name']}:{map_name}")
+            shop_log.publish("purchase", f"{interaction.user.display_name} bought {item['name']} ({item['price']} pts) on {map_name}")
             await interaction.response.send_message(f"✅ Delivered {item['name']} on {map_name}.", ephemeral=True)
         except Exception:
-            queue_delivery(player_id, item['name'], item['command'], map_name, item['price'])
+            queue_delivery(player_id, item['name'], cmd, map_name, item['price'])
             log_transaction(player_id, -item['price'], "Queued", source=f"buy:{item['name']}:{map_name}")
+            shop_log.publish("purchase", f"{interaction.user.display_name} bought {item['name']} ({item['price']} pts) on {map_name} — queued")
             await interaction.response.send_message(f"📦 Queued {item['name']} for {map_name}.", ephemeral=True)
 
 class MapSelectView(View):
@@ -250,8 +304,11 @@ async def on_interaction(interaction: discord.Interaction):
     if interaction.data.get('custom_id')=='deliver_queue':
         if not interaction.user.guild_permissions.administrator:
             return await interaction.response.send_message("❌ Admins only.", ephemeral=True)
-        count=deliver_queued_items()
-        await interaction.response.send_message(f"✅ Delivered {count} queued items.", ephemeral=True)
+        # The drain blocks on RCON and the DB, so it runs off the bot loop
+        await interaction.response.defer(ephemeral=True)
+        count=await asyncio.to_thread(deliver_queued_items)
+        shop_log.publish("delivery", f"{interaction.user.display_name} delivered {count} queued items")
+        await interaction.followup.send(f"✅ Delivered {count} queued items.", ephemeral=True)
 
 @bot.tree.command(name="postshop", description="Post the shop menu")
 async def postshop(interaction: discord.Interaction):
@@ -293,6 +350,9 @@ async def resetretry(ctx, member: discord.Member, player_id: str):
         return await ctx.send(f"🔄 Reset retry for {member.display_name}@{player_id}")
     await ctx.send(f"ℹ️ No record for {member.display_name}@{player_id}")
 
+if PROFILER.enabled:
+    PROFILER.mark_ready()
+    sys.exit(PROFILER.finish())
 if not DISCORD_TOKEN:
     print("[ERROR] DISCORD_TOKEN environment variable is missing. Please set it in .env before running.")
     sys.exit(1)
@@ -1,13 +1,20 @@
-import os
 import sys
+from startup_profile import StartupProfiler
+# Created first so --profile-startup can time every import below
+PROFILER = StartupProfiler.from_argv(sys.argv)
+import os
 import json
+import logging
 import subprocess
+import threading
+from collections import deque
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog, ttk
 from tkinter.scrolledtext import ScrolledText
 from pathlib import Path
-from arklib_loader import load_ark_lib, ArkItem
-import command_builders
+from arklib_loader import load_ark_lib
+import shop_catalog
+from log_stream import LEVELS, LogRingBuffer, ProcessLogReader, level_at_least, make_file_logger
 
 # Paths
 ENV_PATH = '.env'
@@ -15,6 +22,13 @@ SHOP_ITEMS_PATH = 'shop_items.json'
 ASSETS_DIR = 'assets'
 LOGO_PATH = os.path.join(ASSETS_DIR, 'logo.png')
 ICON_PATH = os.path.join(ASSETS_DIR, 'icon.png')
+LIB_ALL_SECTIONS = 'All'
+LOG_FILE = Path('logs') / 'wrecksshop.log'
+# Log pipeline limits: lines held between reader thread and UI, lines shown, lines applied per tick
+LOG_BUFFER_LINES = 10000
+LOG_VISIBLE_LINES = 2000
+LOG_BATCH_LINES = 500
+LOG_POLL_MS = 100
 # CSV data library path (robust lookup)
 base_dir = Path(__file__).parent
 csv_path = base_dir / 'data' / 'CleanArkData.csv'
@@ -24,7 +38,16 @@ if not csv_path.is_file():
     tk.Tk().withdraw()
     messagebox.showerror('Error', f'CleanArkData.csv not found at {csv_path}')
     sys.exit(1)
-ARK_DATA = load_ark_lib(csv_path)
+# Parsed on first use (or by a background warm-up) so the window appears before the CSV is read
+_ark_data = None
+_ark_data_lock = threading.Lock()
+
+def get_ark_data():
+    global _ark_data
+    with _ark_data_lock:
+        if _ark_data is None:
+            _ark_data = load_ark_lib(csv_path)
+    return _ark_data
 
 # Config keys for .env
 CONFIG_KEYS = [
@@ -59,8 +82,14 @@ class WrecksShopLauncher:
         self.servers = []
         self.databases = []
         self.categories = []
+        self.process = None
+        self.log_reader = None
+        self.log_buffer = LogRingBuffer(LOG_BUFFER_LINES)
+        self.log_history = deque(maxlen=LOG_BUFFER_LINES)
+        self.file_log = make_file_logger(LOG_FILE)
         # Load config (themes before building tabs)
-        self._load_env()
+        with PROFILER.phase('load .env'):
+            self._load_env()
         style = ttk.Style()
         style.theme_use('clam')
         style.configure('TNotebook.Tab', font=('Montserrat',10), padding=(10,8), background='#e6e6fa', borderwidth=1)
@@ -69,18 +98,22 @@ class WrecksShopLauncher:
         self.nb = ttk.Notebook(root)
         self.nb.pack(expand=True, fill='both', padx=10, pady=10)
         # Build tabs
-        self._build_config_tab()
-        self._build_servers_tab()
-        self._build_databases_tab()
-        self._build_shop_tab()
-        self._build_library_tab()
-        self._build_logs_tab()
-        # Load displays
-        self._load_servers()
-        self._load_databases()
-        self._load_shop_items()
-        self._load_library_display()
-        self.process = None
+        with PROFILER.phase('build tabs'):
+            self._build_config_tab()
+            self._build_servers_tab()
+            self._build_databases_tab()
+            self._build_shop_tab()
+            self._build_library_tab()
+            self._build_logs_tab()
+        # Load displays (the data library fills in when its tab is first opened)
+        with PROFILER.phase('load servers/databases/shop items'):
+            self._load_servers()
+            self._load_databases()
+            self._load_shop_items()
+        self.lib_loaded = False
+        self.nb.bind('<<NotebookTabChanged>>', self._on_tab_changed)
+        threading.Thread(target=get_ark_data, daemon=True).start()
+        self.root.after(LOG_POLL_MS, self._pump_logs)
 
     def _build_config_tab(self):
         frame = ttk.Frame(self.nb)
@@ -145,48 +178,100 @@ class WrecksShopLauncher:
         frame=ttk.Frame(self.nb)
         self.nb.add(frame, text='Data Library')
         ttk.Label(frame, text='Category').pack(anchor='w', pady=(5,0))
-        self.lib_type_var = tk.StringVar()
-        types = list(ARK_DATA.keys())
-        self.lib_type_combo = ttk.Combobox(frame, textvariable=self.lib_type_var, values=types, state='readonly')
+        self.lib_type_var = tk.StringVar(value=LIB_ALL_SECTIONS)
+        self.lib_type_combo = ttk.Combobox(frame, textvariable=self.lib_type_var, values=[LIB_ALL_SECTIONS], state='readonly')
         self.lib_type_combo.pack(fill='x', padx=5, pady=2)
+        self.lib_type_combo.bind('<<ComboboxSelected>>', lambda e: self._on_type_select())
+        ttk.Label(frame, text='Search').pack(anchor='w')
+        self.lib_search_var = tk.StringVar()
+        search = ttk.Entry(frame, textvariable=self.lib_search_var)
+        search.pack(fill='x', padx=5, pady=2)
+        search.bind('<KeyRelease>', lambda e: self._on_type_select())
         cols=('Name','Blueprint Path','Mod/DLC')
-        self.lib_tv=ttk.Treeview(frame,columns=cols,show='headings')
+        self.lib_tv=ttk.Treeview(frame,columns=cols,show='headings',selectmode='extended')
         for c in cols: self.lib_tv.heading(c,text=c)
         self.lib_tv.pack(expand=True,fill='both',pady=5)
-        ttk.Button(frame,text='Import Selection',command=self._on_lib_import).pack(pady=(0,5))
+        self.lib_rows = {}
+        btnf=ttk.Frame(frame);btnf.pack(pady=(0,5))
+        ttk.Button(btnf,text='Import Selection',command=self._on_lib_import).pack(side='left',padx=5)
+        ttk.Button(btnf,text='Bulk Import Selected',command=self._on_lib_bulk_selected).pack(side='left',padx=5)
+        ttk.Button(btnf,text='Bulk Import All Shown',command=self._on_lib_bulk_shown).pack(side='left',padx=5)
+        self.lib_frame = frame
 
-    def _populate_library_types(self):
-        if ARK_DATA:
-            default = list(ARK_DATA.keys())[0]
-            self.lib_type_combo.set(default)
-            self._on_type_select()
+    def _on_tab_changed(self, event):
+        if not self.lib_loaded and self.nb.select() == str(self.lib_frame):
+            self._load_library_display()
 
     def _on_type_select(self):
+        ark_data = get_ark_data()
         section = self.lib_type_var.get()
+        needle = self.lib_search_var.get().strip().lower()
+        sections = ark_data.keys() if section in ('', LIB_ALL_SECTIONS) else [section]
         self.lib_tv.delete(*self.lib_tv.get_children())
-        for item in ARK_DATA.get(section, []):
-            self.lib_tv.insert('', 'end', values=(item.name, item.blueprint, item.mod))
+        self.lib_rows = {}
+        for sec in sections:
+            for item in ark_data.get(sec, []):
+                if needle and needle not in item.name.lower():
+                    continue
+                iid = self.lib_tv.insert('', 'end', values=(item.name, item.blueprint, item.mod))
+                self.lib_rows[iid] = item
 
     def _on_lib_import(self):
         sel = self.lib_tv.selection()
         if not sel: return
-        name, blueprint, mod = self.lib_tv.item(sel, 'values')
+        ark_item = self.lib_rows[sel[0]]
+        entry = shop_catalog.build_catalog_entries([ark_item])[0]
         self.name_entry.delete(0, tk.END)
-        self.name_entry.insert(0, name)
-        section = self.lib_type_var.get()
-        ark_item = ArkItem(section=section, name=name, blueprint=blueprint, mod=mod)
-        if section.lower().startswith('creature') or section.lower() == 'creatures':
-            cmd = command_builders.build_spawn_dino_command(eos_id='{eos_id}', item=ark_item, level=224, breedable=False)
-        else:
-            cmd = command_builders.build_giveitem_command(player_id='{player_id}', item=ark_item, qty=1, quality=1, is_bp=False)
+        self.name_entry.insert(0, entry['name'])
         self.command_entry.delete(0, tk.END)
-        self.command_entry.insert(0, cmd)
-        self._log(f"Imported {name} from '{section}' library")
-        
+        self.command_entry.insert(0, entry['command'])
+        self.price_entry.delete(0, tk.END)
+        self.price_entry.insert(0, str(entry['price']))
+        self._log(f"Imported {ark_item.name} from '{ark_item.section}' library")
+
+    def _on_lib_bulk_selected(self):
+        self._bulk_import([self.lib_rows[iid] for iid in self.lib_tv.selection()])
+
+    def _on_lib_bulk_shown(self):
+        self._bulk_import([self.lib_rows[iid] for iid in self.lib_tv.get_children()])
+
+    def _bulk_import(self, items):
+        cat=self.cat_combo.get().strip()
+        if not cat:
+            messagebox.showerror('Error','Select a category on the Shop Items tab')
+            return
+        if not items: return
+        entries=shop_catalog.build_catalog_entries(items, shop_catalog.load_pricing_rules())
+        store=shop_catalog.load_shop_items(SHOP_ITEMS_PATH)
+        present=shop_catalog.existing_names(store,cat,entries)
+        replace=False
+        if present:
+            answer=messagebox.askyesnocancel('Bulk Import',
+                f"{len(present)} of these items already exist in {cat}.\n"
+                "Yes: replace them (overwrites price, roles and limit)\n"
+                "No: skip them and import only new items")
+            if answer is None: return
+            replace=answer
+        added,matched,duplicates=shop_catalog.merge_entries(store,cat,entries,replace=replace)
+        shop_catalog.save_shop_items(store,SHOP_ITEMS_PATH)
+        self._show_shop_items(store)
+        msg=f"Bulk imported {added} new items into {cat}, {'replaced' if replace else 'skipped'} {matched} existing"
+        if duplicates: msg+=f", ignored {duplicates} repeated names in the selection"
+        self._log(msg)
+
     def _build_logs_tab(self):
         frame=ttk.Frame(self.nb)
         self.nb.add(frame,text='Logs')
+        bar=ttk.Frame(frame);bar.pack(fill='x',pady=(5,0))
+        ttk.Button(bar,text='Start Bot',command=self.start_bot).pack(side='left',padx=5)
+        ttk.Label(bar,text='Level').pack(side='left',padx=(10,2))
+        self.log_level_var=tk.StringVar(value='INFO')
+        level_combo=ttk.Combobox(bar,textvariable=self.log_level_var,values=LEVELS,state='readonly',width=10)
+        level_combo.pack(side='left')
+        level_combo.bind('<<ComboboxSelected>>',lambda e:self._render_logs())
         self.log_box=ScrolledText(frame,state='disabled',font=('Consolas',10))
+        self.log_box.tag_configure('WARNING',foreground='#b8860b')
+        self.log_box.tag_configure('ERROR',foreground='#c0392b')
         self.log_box.pack(expand=True,fill='both',pady=5)
         ttk.Button(frame,text='Save Log',command=self._save_log).pack(pady=5)
 
@@ -261,13 +346,16 @@ class WrecksShopLauncher:
 
     def _load_shop_items(self):
         if os.path.exists(SHOP_ITEMS_PATH):
-            data=json.load(open(SHOP_ITEMS_PATH))
-            for cat,items in data.items():
-                for itm in items:
-                    roles='all' if itm.get('roles')=='all' else ','.join(itm.get('roles',[]))
-                    self.item_tv.insert('', 'end', values=(itm['name'],itm['command'],itm['price'],itm['limit'],roles))
+            self._show_shop_items(shop_catalog.load_shop_items(SHOP_ITEMS_PATH))
             self.cat_combo['values']=self.categories
 
+    def _show_shop_items(self, store):
+        self.item_tv.delete(*self.item_tv.get_children())
+        for cat,items in store.items():
+            for itm in items:
+                roles='all' if itm.get('roles')=='all' else ','.join(itm.get('roles',[]))
+                self.item_tv.insert('', 'end', values=(itm['name'],itm['command'],itm['price'],itm['limit'],roles))
+
     def _add_category(self):
         name=simpledialog.askstring('Category','Enter category name:')
         if name and name not in self.categories:
@@ -297,56 +385,84 @@ class WrecksShopLauncher:
             return
         roles_val='all' if roles=='all' else [r.strip() for r in roles.split(',') if r.strip()]
         itm={'name':name,'command':cmd,'price':price_val,'limit':limit,'roles':roles_val}
-        store=json.load(open(SHOP_ITEMS_PATH)) if os.path.exists(SHOP_ITEMS_PATH) else {}
+        store=shop_catalog.load_shop_items(SHOP_ITEMS_PATH)
         store.setdefault(cat,[]).append(itm)
-        with open(SHOP_ITEMS_PATH,'w') as f:json.dump(store,f,indent=2)
+        shop_catalog.save_shop_items(store,SHOP_ITEMS_PATH)
         role_disp='all' if roles_val=='all' else ','.join(roles_val)
         self.item_tv.insert('', 'end', values=(name,cmd,price_val,limit,role_disp))
         self._log(f"Added item: {name} in category {cat}")
 
     def _load_library_display(self):
-        for section, items in ARK_DATA.items():
-            for item in items:
-                self.lib_tv.insert('', 'end', values=(item.name, item.blueprint, item.mod))
+        self.lib_type_combo['values'] = [LIB_ALL_SECTIONS] + list(get_ark_data().keys())
+        self._on_type_select()
+        self.lib_loaded = True
 
-    def _on_lib_import(self):
-        sel=self.lib_tv.selection()
-        if not sel: return
-        name, blueprint, mod = self.lib_tv.item(sel,'values')
-        self.name_entry.delete(0,tk.END)
-        self.name_entry.insert(0,name)
-        try:
-            ark_item=ArkItem(section='',name=name,blueprint=blueprint,mod=mod)
-            cmd=command_builders.build_spawn_dino_command(eos_id='',item=ark_item,level=1,breedable=False)
-        except Exception:
-            cmd=command_builders.build_giveitem_command(player_id=0,item=ArkItem('',name,blueprint,mod),qty=1,quality=1,is_bp=False)
-        self.command_entry.delete(0,tk.END)
-        self.command_entry.insert(0,cmd)
-        self._log(f"Imported {name} from library")
+    def _log(self,text,level='INFO'):
+        self.log_buffer.push(level,text)
+        self.file_log.log(getattr(logging,level),text)
+
+    def _pump_logs(self):
+        # Apply whatever the reader thread buffered as one Text update per tick
+        lines,dropped=self.log_buffer.drain(LOG_BATCH_LINES)
+        if dropped:
+            lines.insert(0,('WARNING',f'... {dropped} lines dropped from view (see {LOG_FILE}) ...'))
+        if lines:
+            self.log_history.extend(lines)
+            minimum=self.log_level_var.get()
+            self._append_log_lines([(lvl,l) for lvl,l in lines if level_at_least(lvl,minimum)])
+        if self.process and self.process.poll() is not None and not self.log_reader.is_alive():
+            self._log(f'Bot exited with code {self.process.returncode}','WARNING' if self.process.returncode else 'INFO')
+            self.process=None
+        self.root.after(1 if len(lines)>=LOG_BATCH_LINES else LOG_POLL_MS,self._pump_logs)
 
-    def _log(self,text):
-        self.log_box.configure(state='normal');self.log_box.insert('end',text+"\n");self.log_box.configure(state='disabled')
+    def _append_log_lines(self,lines):
+        if not lines: return
+        args=[]
+        for lvl,line in lines:
+            args.extend((line+"\n",lvl))
+        self.log_box.configure(state='normal')
+        self.log_box.insert('end',*args)
+        count=int(self.log_box.index('end-1c').split('.')[0])-1
+        if count>LOG_VISIBLE_LINES:
+            self.log_box.delete('1.0',f'{count-LOG_VISIBLE_LINES+1}.0')
+        self.log_box.configure(state='disabled')
+        self.log_box.see('end')
+
+    def _render_logs(self):
+        minimum=self.log_level_var.get()
+        shown=[(lvl,l) for lvl,l in self.log_history if level_at_least(lvl,minimum)]
+        self.log_box.configure(state='normal');self.log_box.delete('1.0','end');self.log_box.configure(state='disabled')
+        self._append_log_lines(shown[-LOG_VISIBLE_LINES:])
 
     def _save_log(self):
         path=filedialog.asksaveasfilename(defaultextension='.txt')
         if path:
-            with open(path,'w') as f: f.write(self.log_box.get('1.0','end'))
+            minimum=self.log_level_var.get()
+            with open(path,'w') as f:
+                f.writelines(l+"\n" for lvl,l in self.log_history if level_at_least(lvl,minimum))
             messagebox.showinfo('Saved',f'Log saved to {path}')
 
     def start_bot(self):
         if self.process:
             messagebox.showwarning('Running','Bot is already running')
             return
-        self.process=subprocess.Popen(['python','Discord_Shop_System.py'],stdout=subprocess.PIPE,stderr=subprocess.STDOUT,text=True)
-        self._read_output()
-
-    def _read_output(self):
-        if self.process.poll() is None:
-            line=self.process.stdout.readline()
-            if line: self._log(line.strip())
-            self.root.after(100,self._read_output)
+        self.process=subprocess.Popen(['python','-u','Discord_Shop_System.py'],stdout=subprocess.PIPE,stderr=subprocess.STDOUT,
+                                      text=True,bufsize=1,encoding='utf-8',errors='replace')
+        self.log_reader=ProcessLogReader(self.process.stdout,self.log_buffer,self.file_log)
+        self.log_reader.start()
+        self._log(f'Bot started (pid {self.process.pid}), logging to {LOG_FILE}')
 
 if __name__=='__main__':
-    root=tk.Tk()
-    WrecksShopLauncher(root)
+    with PROFILER.phase('create Tk root'):
+        root=tk.Tk()
+    with PROFILER.phase('build launcher window'):
+        WrecksShopLauncher(root)
+    if PROFILER.enabled:
+        with PROFILER.phase('first paint'):
+            root.update()
+        PROFILER.mark_ready()
+        with PROFILER.phase('parse data library (deferred)'):
+            get_ark_data()
+        root.destroy()
+        sys.exit(PROFILER.finish())
     root.mainloop()
@@ -1,13 +1,13 @@
 from typing import Iterable, Dict, Any, List
 from arklib_loader import ArkItem
-from command_builders import build_single, build_spawn_dino_command
+from command_builders import build_single, build_spawn_dino_command, coalesce_commands
 
 ALLOWED_BATCH_CATEGORIES = {
     "starter kits", "base kits", "consumables",
     "breeding pairs", "structures", "armor",
 }
 
-def build_batch(batch_entries: Iterable[Dict[str, Any]], joiner: str = "\n") -> str:
+def build_batch(batch_entries: Iterable[Dict[str, Any]], joiner: str = "\n", coalesce: bool = True) -> str:
     """
     batch_entries: iterable of dicts, each with:
       - category: str
@@ -17,6 +17,9 @@ def build_batch(batch_entries: Iterable[Dict[str, Any]], joiner: str = "\n") ->
 
     Special case: category == "Breeding Pairs" (case-insensitive) => spawn two dinos/item (male/female).
     Expected keys per pair: eos_id_m, eos_id_f, level_m, level_f, breedable_m, breedable_f
+
+    coalesce: merge repeated giveitem commands (same player/blueprint/quality/bp flag)
+    into one with the summed quantity. Dino spawns are one command each and are kept as is.
     """
     all_cmds: List[str] = []
 
@@ -47,4 +50,6 @@ def build_batch(batch_entries: Iterable[Dict[str, Any]], joiner: str = "\n") ->
                 p = {**shared, **(overrides[idx] or {})}
                 all_cmds.extend(build_single(item, **p))
 
+    if coalesce:
+        all_cmds = coalesce_commands(all_cmds)
     return joiner.join(all_cmds)
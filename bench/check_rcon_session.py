@@ -0,0 +1,103 @@
+"""Self-check for rcon_session.RconSession against the local RCON stand-in.
+
+The chat poller and presence tracker call RconSession.command through
+asyncio.to_thread, so every check here runs it from a worker thread:
+
+    python -m bench.check_rcon_session
+"""
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.rcon_stub import RconStubServer
+from rcon_session import RconError, RconSession
+
+
+def _in_worker(fn, *args):
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def check_worker_thread_command():
+    with RconStubServer(handlers={"listplayers": lambda c: "0. Alice, 0002aaa"}) as stub:
+        session = RconSession({"name": "stub", "host": stub.address[0], "port": stub.address[1],
+                               "password": stub.password})
+        assert _in_worker(session.command, "ListPlayers") == "0. Alice, 0002aaa"
+        assert _in_worker(session.command, "GetChat").startswith("Server received")
+        session.close()
+
+
+def check_reconnects_after_drop():
+    with RconStubServer(fail_rate=1.0, seed=1) as stub:
+        session = RconSession({"host": stub.address[0], "port": stub.address[1], "password": stub.password},
+                              timeout=1.0)
+        try:
+            _in_worker(session.command, "GetChat")
+        except RconError:
+            pass
+        else:
+            raise AssertionError("a dropped connection must raise, not hang or return")
+        stub.fail_rate = 0.0
+        assert _in_worker(session.command, "GetChat").startswith("Server received")
+        session.close()
+
+
+def check_split_reply():
+    # A multi-packet reply must be read whole and must not leak into the next command
+    chat = "A (Ann): hello\nB (Bo): /points"
+    with RconStubServer(packet_size=12, packet_gap_ms=50,
+                        handlers={"getchat": lambda c: chat,
+                                  "listplayers": lambda c: "0. Ann, 0002aaa"}) as stub:
+        session = RconSession({"host": stub.address[0], "port": stub.address[1], "password": stub.password})
+        assert _in_worker(session.command, "GetChat") == chat
+        assert _in_worker(session.command, "ListPlayers") == "0. Ann, 0002aaa"
+        session.close()
+
+
+def check_bad_password():
+    with RconStubServer() as stub:
+        session = RconSession({"host": stub.address[0], "port": stub.address[1], "password": "wrong"})
+        try:
+            _in_worker(session.command, "GetChat")
+        except RconError:
+            return
+        raise AssertionError("login with a wrong password must raise RconError")
+
+
+def check_silent_server_times_out():
+    # Accepts the TCP connection but never answers the login
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    session = RconSession({"host": "127.0.0.1", "port": listener.getsockname()[1], "password": "x"}, timeout=0.5)
+    start = time.monotonic()
+    try:
+        _in_worker(session.command, "GetChat")
+    except OSError:
+        pass
+    else:
+        raise AssertionError("a silent server must time out")
+    finally:
+        listener.close()
+    assert time.monotonic() - start < 3, "timeout was not applied to the login read"
+
+
+CHECKS = [check_worker_thread_command, check_reconnects_after_drop, check_split_reply, check_bad_password,
+          check_silent_server_times_out]
+
+
+def main() -> int:
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+            print(f"ok    {check.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"FAIL  {check.__name__}: {e!r}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""SQLite-backed stand-in for the MariaDB connections in ``shop_logic.db_conns``.
+
+Accepts the pymysql ``%s`` paramstyle and autocommits, so the shop helpers
+run unchanged against it. Schema mirrors ``db.py``.
+"""
+import sqlite3
+import threading
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY,
+        player_id TEXT,
+        points INTEGER,
+        status TEXT,
+        source TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS pending_deliveries (
+        id INTEGER PRIMARY KEY,
+        player_id TEXT,
+        item_name TEXT,
+        command TEXT,
+        map TEXT,
+        price INTEGER,
+        status TEXT DEFAULT 'pending',
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_tx_player ON transactions (player_id)",
+)
+
+
+class LocalCursor:
+    """Buffers each result set so cursors can be used from several threads."""
+
+    def __init__(self, conn: "LocalConnection"):
+        self._conn = conn
+        self._rows = []
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def execute(self, sql, params=()):
+        sql = sql.replace("%s", "?")
+        with self._conn.lock:
+            cur = self._conn.raw.execute(sql, params)
+            self._rows = cur.fetchall()
+            self.rowcount = cur.rowcount
+            self.lastrowid = cur.lastrowid
+            self._conn.raw.commit()
+        return self.rowcount
+
+    def executemany(self, sql, seq):
+        sql = sql.replace("%s", "?")
+        with self._conn.lock:
+            cur = self._conn.raw.executemany(sql, seq)
+            self.rowcount = cur.rowcount
+            self._conn.raw.commit()
+        return self.rowcount
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        self._rows = []
+
+
+class LocalConnection:
+    """Minimal pymysql.Connection look-alike (cursor/commit/close)."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.raw = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        for stmt in SCHEMA:
+            self.raw.execute(stmt)
+        self.raw.commit()
+
+    def cursor(self):
+        return LocalCursor(self)
+
+    def commit(self):
+        with self.lock:
+            self.raw.commit()
+
+    def close(self):
+        self.raw.close()
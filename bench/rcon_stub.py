@@ -0,0 +1,166 @@
+"""Local stand-in for an ARK server's Source RCON endpoint.
+
+Speaks the Source RCON wire protocol (little-endian size/id/type header,
+null-terminated body) so both ``mcrcon`` and ``rcon_session.RconSession`` can talk to it. Latency
+and failures are injected per command so delivery paths can be benchmarked
+without a live server.
+"""
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from rcon_session import (SERVERDATA_AUTH, SERVERDATA_AUTH_RESPONSE, SERVERDATA_RESPONSE_VALUE,
+                          pack_packet)
+
+DEFAULT_RESPONSE = "Server received, But no response!! "
+
+
+class _RconHandler(socketserver.BaseRequestHandler):
+    def _read(self, length: int) -> bytes:
+        data = b""
+        while len(data) < length:
+            chunk = self.request.recv(length - len(data))
+            if not chunk:
+                raise ConnectionError("client closed")
+            data += chunk
+        return data
+
+    def handle(self):
+        stub: "RconStubServer" = self.server.stub
+        authed = False
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                (length,) = struct.unpack("<i", self._read(4))
+                payload = self._read(length)
+                req_id, ptype = struct.unpack("<ii", payload[:8])
+                body = payload[8:-2].decode("utf8")
+                if ptype == SERVERDATA_AUTH:
+                    authed = body == stub.password and not stub.auth_fail
+                    self.request.sendall(pack_packet(req_id if authed else -1, SERVERDATA_AUTH_RESPONSE, ""))
+                    continue
+                if not authed:
+                    return
+                if ptype == SERVERDATA_RESPONSE_VALUE:
+                    # End-of-response probe: echo it, then the 0x0001 marker a Source server sends after it
+                    self.request.sendall(pack_packet(req_id, SERVERDATA_RESPONSE_VALUE, "")
+                                         + pack_packet(req_id, SERVERDATA_RESPONSE_VALUE, "\x00\x01"))
+                    continue
+                stub._wait()
+                if stub._should_fail():
+                    # Drop the connection mid-command, as an overloaded server would
+                    stub.failed += 1
+                    return
+                response = stub.respond(body)
+                size = stub.packet_size or len(response) or 1
+                for start in range(0, max(len(response), 1), size):
+                    if start:
+                        stub._packet_gap()
+                    self.request.sendall(pack_packet(req_id, SERVERDATA_RESPONSE_VALUE, response[start:start + size]))
+        except (ConnectionError, struct.error, OSError):
+            return
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class RconStubServer:
+    """Threaded RCON server bound to localhost.
+
+    latency_ms/jitter_ms delay every command response, fail_rate drops the
+    connection on that fraction of commands and auth_fail rejects every login.
+    packet_size splits responses into packets of at most that many characters,
+    sent packet_gap_ms apart, as a server does with long replies.
+    ``handlers`` maps a lower-case command prefix (e.g. ``"listplayers"``) to
+    a callable returning the response body; every executed command is kept in
+    ``commands`` for later assertions.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, password: str = "changeme",
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, fail_rate: float = 0.0,
+                 auth_fail: bool = False, packet_size: int = 0, packet_gap_ms: float = 0.0,
+                 seed: Optional[int] = None,
+                 handlers: Optional[Dict[str, Callable[[str], str]]] = None):
+        self.password = password
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.auth_fail = auth_fail
+        self.packet_size = packet_size
+        self.packet_gap_ms = packet_gap_ms
+        self.handlers = dict(handlers or {})
+        self.commands: List[str] = []
+        self.failed = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _ThreadingServer((host, port), _RconHandler)
+        self._server.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def _wait(self):
+        with self._lock:
+            delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def _packet_gap(self):
+        if self.packet_gap_ms > 0:
+            time.sleep(self.packet_gap_ms / 1000.0)
+
+    def _should_fail(self) -> bool:
+        if self.fail_rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < self.fail_rate
+
+    def respond(self, command: str) -> str:
+        with self._lock:
+            self.commands.append(command)
+        key = command.strip().lower()
+        for prefix, handler in self.handlers.items():
+            if key.startswith(prefix):
+                return handler(command)
+        return DEFAULT_RESPONSE
+
+    def start(self) -> "RconStubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Run a local RCON stand-in server.")
+    ap.add_argument("--port", type=int, default=25575)
+    ap.add_argument("--password", default="changeme")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    srv = RconStubServer(port=args.port, password=args.password, latency_ms=args.latency_ms,
+                         jitter_ms=args.jitter_ms, fail_rate=args.fail_rate)
+    print(f"RCON stand-in listening on {srv.address[0]}:{srv.address[1]}")
+    try:
+        srv._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,191 @@
+"""End-to-end throughput benchmark for the shop purchase and delivery paths.
+
+Runs the real helpers from ``shop_logic`` and ``batch_builder`` against a
+local SQLite stand-in and a local RCON stand-in, so no Discord, ARK server or
+MariaDB is needed:
+
+    python -m bench.shop_bench --purchases 2000 --concurrency 8 --rcon-latency-ms 5 \
+        --output bench/results/HEAD.json --compare bench/results/main.json
+
+Output is a JSON document (purchases/sec, p50/p99 purchase latency, queue
+drain time, RCON counters) tagged with the current git commit so runs can be
+diffed across commits.
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from arklib_loader import ArkItem, load_ark_lib
+from batch_builder import build_batch
+from paths import resource_path
+import shop_logic
+
+from bench.local_db import LocalConnection
+from bench.rcon_stub import RconStubServer
+
+MAPS = ["The Island", "Scorched Earth", "Aberration", "Extinction", "Ragnarok"]
+
+# Metrics where a larger number is better; everything else is "lower is better"
+HIGHER_IS_BETTER = {"purchases_per_sec", "drain_items_per_sec"}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def load_catalog() -> Dict[str, List[ArkItem]]:
+    return load_ark_lib(resource_path("data/CleanArkData.csv"))
+
+
+def make_purchase(rng: random.Random, catalog: Dict[str, List[ArkItem]], player_num: int, kit_size: int):
+    """Pick a random catalog purchase and return (player_id, name, batch_entries, price)."""
+    player_id = str(100000 + player_num)
+    if kit_size > 1:
+        items = rng.sample(catalog["items"], kit_size)
+        entry = {"category": "Starter Kits", "items": items,
+                 "params": {"player_id": player_id, "qty": 1, "quality": 1}}
+        return player_id, f"Kit x{kit_size}", [entry], 50
+    section = rng.choice([s for s in ("items", "creatures") if catalog.get(s)])
+    item = rng.choice(catalog[section])
+    params = {"eos_id": player_id, "level": 150} if section == "creatures" else {"player_id": player_id, "qty": 1}
+    entry = {"category": section, "items": [item], "params": params}
+    return player_id, item.name, [entry], 10
+
+
+def purchase(player_id: str, name: str, entries, price: int, map_name: str) -> Optional[float]:
+    """One queued purchase as the shop performs it; returns latency in seconds or None if rejected."""
+    t0 = time.perf_counter()
+    if shop_logic.get_balance(player_id) < price:
+        return None
+    command = build_batch(entries)
+    shop_logic.log_transaction(player_id, -price, "Queued", source=f"buy:{name}:{map_name}")
+    shop_logic.queue_delivery(player_id, name, command, map_name, price)
+    return time.perf_counter() - t0
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    catalog = load_catalog()
+
+    conn = LocalConnection(args.db)
+    shop_logic.db_conns["primary"] = conn
+    for p in range(args.players):
+        shop_logic.log_transaction(str(100000 + p), args.starting_points, "Seed", source="bench")
+
+    jobs = []
+    for _ in range(args.purchases):
+        player_id, name, entries, price = make_purchase(rng, catalog, rng.randrange(args.players), args.kit_size)
+        jobs.append((player_id, name, entries, price, rng.choice(MAPS)))
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(lambda job: purchase(*job), jobs))
+    purchase_elapsed = time.perf_counter() - t0
+    accepted = [lat for lat in latencies if lat is not None]
+
+    stub = RconStubServer(password=shop_logic.RCON_PASSWORD, latency_ms=args.rcon_latency_ms,
+                          jitter_ms=args.rcon_jitter_ms, fail_rate=args.rcon_fail_rate, seed=args.seed)
+    with stub:
+        shop_logic.RCON_HOST, shop_logic.RCON_PORT = stub.address
+        t0 = time.perf_counter()
+        delivered = shop_logic.deliver_queued_items()
+        drain_elapsed = time.perf_counter() - t0
+
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM pending_deliveries WHERE status='pending'")
+    still_pending = cur.fetchone()[0]
+    cur.close()
+    conn.close()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "metrics": {
+            "purchases": len(accepted),
+            "rejected": len(latencies) - len(accepted),
+            "purchases_per_sec": round(len(accepted) / purchase_elapsed, 2) if purchase_elapsed else 0.0,
+            "latency_p50_ms": round(percentile(accepted, 50) * 1000, 3),
+            "latency_p99_ms": round(percentile(accepted, 99) * 1000, 3),
+            "queue_drain_s": round(drain_elapsed, 4),
+            "drain_items_per_sec": round(delivered / drain_elapsed, 2) if drain_elapsed else 0.0,
+            "delivered": delivered,
+            "still_pending": still_pending,
+            "rcon_commands": len(stub.commands),
+            "rcon_failures": stub.failed,
+        },
+    }
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Return a line per shared metric and flag regressions beyond max_regression (fraction)."""
+    lines, regressions = [], []
+    for key, new in current["metrics"].items():
+        old = baseline.get("metrics", {}).get(key)
+        if not isinstance(old, (int, float)) or not old:
+            continue
+        change = (new - old) / old
+        worse = -change if key in HIGHER_IS_BETTER else change
+        flag = ""
+        if key in HIGHER_IS_BETTER or key.endswith(("_ms", "_s")):
+            if worse > max_regression:
+                flag = "  <-- REGRESSION"
+                regressions.append(key)
+        lines.append(f"{key:22} {old:>12} -> {new:>12} ({change:+.1%}){flag}")
+    header = f"baseline {baseline.get('commit', '?')} vs current {current['commit']}"
+    return [header] + lines + ([f"regressed: {', '.join(regressions)}"] if regressions else [])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark shop purchase/delivery throughput locally.")
+    ap.add_argument("--purchases", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--players", type=int, default=200)
+    ap.add_argument("--starting-points", type=int, default=1_000_000)
+    ap.add_argument("--kit-size", type=int, default=1, help="items per purchase (>1 buys kits via build_batch)")
+    ap.add_argument("--rcon-latency-ms", type=float, default=0.0)
+    ap.add_argument("--rcon-jitter-ms", type=float, default=0.0)
+    ap.add_argument("--rcon-fail-rate", type=float, default=0.0)
+    ap.add_argument("--db", default=":memory:", help="SQLite file for the local database target")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--output", help="write the JSON result here as well as stdout")
+    ap.add_argument("--compare", help="baseline JSON result to diff against")
+    ap.add_argument("--max-regression", type=float, default=0.10,
+                    help="fractional slowdown tolerated before --compare exits non-zero")
+    args = ap.parse_args(argv)
+
+    result = run(args)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text + "\n")
+    if args.compare:
+        report = compare(result, json.loads(Path(args.compare).read_text()), args.max_regression)
+        print("\n".join(report), file=sys.stderr)
+        if report[-1].startswith("regressed:"):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""In-game chat command ingestion over RCON ``GetChat``.
+
+Each poll fetches new chat from every server in RCON_SERVERS (in parallel,
+over persistent sessions) and hands the lines to a precompiled prefix router.
+ARK clears its chat buffer on every GetChat, so the server-side read
+position is the cursor: each line is returned exactly once, and a player
+repeating the same command in consecutive polls is two commands. Lines that are
+not commands are discarded with a substring check before any regex, DB or
+RCON work, so the per-line cost stays flat as chat volume grows.
+"""
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from rcon_session import NO_RESPONSE, RconSession, parse_list_players, unique_player
+
+# GetChat lines look like "PlayerName (CharacterName): message"; server notices use "SERVER: ..."
+_CHAT_LINE = r'^(?P<player>[^:()]+?)(?: \((?P<character>[^)]*)\))?: '
+
+@dataclass
+class ChatCommand:
+    server: str
+    player: str
+    character: str
+    command: str
+    args: List[str]
+    raw: str
+
+Handler = Callable[[ChatCommand], Awaitable[None]]
+
+class ChatCommandRouter:
+    """Maps command prefixes (e.g. "/points") to async handlers with one compiled pattern."""
+
+    def __init__(self, handlers: Dict[str, Handler]):
+        self.handlers = {cmd.lower(): h for cmd, h in handlers.items()}
+        alternation = '|'.join(re.escape(cmd) for cmd in sorted(self.handlers, key=len, reverse=True))
+        self._pattern = re.compile(_CHAT_LINE + r'(?P<cmd>' + alternation + r')(?:\s+(?P<args>.*))?$', re.IGNORECASE)
+        # Every command shares its first character ("/"), which is the cheap pre-filter
+        self._markers = {': ' + cmd[0] for cmd in self.handlers}
+
+    def match(self, server: str, line: str) -> Optional[Tuple[Handler, ChatCommand]]:
+        if not any(m in line for m in self._markers):
+            return None
+        m = self._pattern.match(line.strip())
+        if not m or m.group('player').strip().upper() == 'SERVER':
+            return None
+        cmd = m.group('cmd').lower()
+        args = (m.group('args') or '').split()
+        return self.handlers[cmd], ChatCommand(server, m.group('player').strip(),
+                                               (m.group('character') or '').strip(), cmd, args, line)
+
+def split_chat(response: str) -> List[str]:
+    if not response or response.startswith(NO_RESPONSE):
+        return []
+    return [line for line in (l.strip() for l in response.splitlines()) if line]
+
+class ChatPoller:
+    def __init__(self, servers: List[dict], router: ChatCommandRouter, roster_ttl: float = 30.0):
+        self.sessions = {s.get('name') or s['host']: RconSession(s) for s in servers}
+        self.router = router
+        self.roster_ttl = roster_ttl
+        self._rosters: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        self.stats = {'lines': 0, 'commands': 0, 'errors': 0}
+        # Optional PresenceTracker; its last roster answers most lookups without an RCON call
+        self.presence = None
+
+    async def poll_once(self) -> int:
+        """Fetch chat from every server concurrently and dispatch commands; returns commands handled."""
+        names = list(self.sessions)
+        results = await asyncio.gather(*(asyncio.to_thread(self.sessions[n].command, 'GetChat') for n in names),
+                                       return_exceptions=True)
+        handled = 0
+        for server, result in zip(names, results):
+            if isinstance(result, Exception):
+                self.stats['errors'] += 1
+                print(f"[RCON] GetChat failed on {server}: {result}")
+                continue
+            lines = split_chat(result)
+            self.stats['lines'] += len(lines)
+            for line in lines:
+                routed = self.router.match(server, line)
+                if routed is None:
+                    continue
+                handler, cmd = routed
+                try:
+                    await handler(cmd)
+                    handled += 1
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    print(f"[CHAT] {cmd.command} from {cmd.player} on {server} failed: {e}")
+        self.stats['commands'] += handled
+        return handled
+
+    async def resolve_player(self, server: str, name: str) -> Optional[str]:
+        """EOS ID of a player online on ``server``, from presence or a short-lived ListPlayers cache.
+
+        Chat only carries display names, which are not unique: when several
+        online players share ``name`` this returns None and the command is refused.
+        """
+        if self.presence is not None:
+            roster = self.presence.roster(server)
+            if name in roster.values():
+                return unique_player(roster, name)
+        cached = self._rosters.get(server)
+        if cached is None or time.monotonic() - cached[0] > self.roster_ttl or name not in cached[1].values():
+            response = await asyncio.to_thread(self.sessions[server].command, 'ListPlayers')
+            cached = (time.monotonic(), parse_list_players(response))
+            self._rosters[server] = cached
+        return unique_player(cached[1], name)
+
+    def session(self, server: str) -> RconSession:
+        return self.sessions[server]
+
+    def close(self):
+        for session in self.sessions.values():
+            session.close()
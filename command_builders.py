@@ -1,4 +1,5 @@
-from typing import List
+import re
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
 from arklib_loader import ArkItem
 
 def build_giveitem_command(player_id: int, item: ArkItem,
@@ -36,3 +37,43 @@ def build_single(item: ArkItem, **kwargs) -> List[str]:
             is_bp=bool(kwargs.get("is_bp", False)),
         )
         return [cmd]
+
+_GIVEITEM_RE = re.compile(
+    r"^scriptcommand giveitemtoplayer (?P<player>\S+) (?P<bp>.+) (?P<qty>\d+) (?P<quality>\d+) (?P<bp_flag>[01])$",
+    re.IGNORECASE)
+
+def coalesce_with_sources(commands: Iterable[Tuple[Hashable, str]]) -> List[Tuple[str, Set[Hashable]]]:
+    """
+    Merge (source, command) pairs into fewer RCON commands, keeping track of
+    which sources each output command covers. Multi-line commands are split.
+
+    - giveitemtoplayer with the same player, blueprint, quality and bp flag
+      become one command with the summed quantity, at the first one's position.
+    - Anything else, including SpawnDinoinBall (one dino per command, so
+      nothing to merge), passes through unchanged and in order.
+    """
+    slots: List[list] = []  # [command, sources]; merged giveitem commands are filled in at the end
+    items: Dict[tuple, list] = {}
+    qty: Dict[tuple, int] = {}
+    for source, text in commands:
+        for line in (l.strip() for l in text.splitlines()):
+            if not line:
+                continue
+            m = _GIVEITEM_RE.match(line)
+            if m:
+                key = (m["player"], m["bp"], m["quality"], m["bp_flag"])
+                if key not in items:
+                    items[key] = [None, set()]
+                    slots.append(items[key])
+                    qty[key] = 0
+                qty[key] += int(m["qty"])
+                items[key][1].add(source)
+                continue
+            slots.append([line, {source}])
+    for (player, bp, quality, bp_flag), slot in items.items():
+        slot[0] = f"scriptcommand giveitemtoplayer {player} {bp} {qty[(player, bp, quality, bp_flag)]} {quality} {bp_flag}"
+    return [(cmd, sources) for cmd, sources in slots]
+
+def coalesce_commands(commands: Iterable[str]) -> List[str]:
+    """Merge duplicate giveitem commands (see coalesce_with_sources)."""
+    return [cmd for cmd, _ in coalesce_with_sources(enumerate(commands))]
@@ -0,0 +1,286 @@
+"""Coalescing publisher for the Discord shop log channel.
+
+Callers (webhook thread, shop views, reward loop) hand events to ``publish``,
+which only appends to an in-memory queue. A background task on the bot loop
+flushes the queue as batched embeds every ``flush_interval`` seconds, or
+sooner once ``batch_size`` events are waiting. Sends go through a per-channel
+token bucket; if Discord is unreachable the batch is spilled to a JSON-lines
+file. While anything is on disk new events are spilled too, so the queue
+only ever holds the oldest events and order is kept end to end. A 4xx other
+than 429 would fail the same way on retry, so that batch is dropped instead.
+Once the channel resolves, the spill is replayed whenever the queue runs dry,
+one slice of at most ``max_queue`` events at a time, so it drains without new
+traffic.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+import discord
+
+# Discord limits: 10 embeds per message, 4096 chars per description, 6000 chars per message
+MAX_EMBEDS = 10
+MAX_DESCRIPTION = 4000
+MAX_MESSAGE_CHARS = 5800
+
+KIND_STYLE = {
+    "purchase": ("🛒 Purchases", 0x2ECC71),
+    "delivery": ("📦 Deliveries", 0x3498DB),
+    "reward": ("⏱️ Rewards", 0xF1C40F),
+    "tip4serv": ("💸 Tip4Serv", 0x9B59B6),
+    "error": ("❌ Errors", 0xE74C3C),
+}
+
+
+class RateBucket:
+    """Token bucket: at most ``rate`` sends per ``per`` seconds."""
+
+    def __init__(self, rate: int = 5, per: float = 5.0):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+
+    async def acquire(self):
+        while True:
+            wait = self.blocked_until - time.monotonic()
+            if wait <= 0:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * self.per / self.rate
+            await asyncio.sleep(wait)
+
+    def block(self, seconds: float):
+        """Honour a 429 retry_after from Discord."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+class LogPublisher:
+    def __init__(self, get_channel: Callable[[], Optional[discord.abc.Messageable]],
+                 spill_path: str = "shop_log_spill.jsonl", flush_interval: float = 5.0,
+                 batch_size: int = 25, max_queue: int = 5000, rate: int = 5, per: float = 5.0):
+        self.get_channel = get_channel
+        self.spill_path = spill_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.bucket = RateBucket(rate, per)
+        self._queue: Deque[Dict] = deque()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # True while spilled events wait on disk; new events queue behind them there
+        self._backlog = os.path.exists(spill_path) or os.path.exists(spill_path + ".replay")
+
+    # ===== Producer side (any thread) =====
+    def publish(self, kind: str, text: str):
+        """Queue a log line and return immediately; safe to call from any thread."""
+        event = {"kind": kind, "text": text, "ts": time.time()}
+        with self._lock:
+            if self._backlog or len(self._queue) >= self.max_queue:
+                # Written under the lock so the replay sees the backlog flag and file agree
+                self._spill([event])
+                return
+            self._queue.append(event)
+            size = len(self._queue)
+        if size >= self.batch_size and self._loop and self._wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # ===== Consumer side (bot loop) =====
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Start the flush task on the bot loop; repeated calls (reconnects) are no-ops."""
+        if self._task and not self._task.done():
+            return
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[LOG] flush failed: {e}")
+
+    def _take(self, limit: int) -> List[Dict]:
+        with self._lock:
+            return [self._queue.popleft() for _ in range(min(limit, len(self._queue)))]
+
+    def _requeue_front(self, events: List[Dict]):
+        with self._lock:
+            self._queue.extendleft(reversed(events))
+
+    async def flush(self):
+        """Send everything queued, one rate-limited message per batch of embeds."""
+        while True:
+            events = self._take(self.batch_size * 4)
+            if not events:
+                if self.get_channel() is None or not self._replay_spill():
+                    return
+                continue
+            channel = self.get_channel()
+            if channel is None:
+                self._spill_unsent(events)
+                return
+            sent_ids = set()
+            for embeds, batch in self._pack(events):
+                await self.bucket.acquire()
+                try:
+                    await channel.send(embeds=embeds)
+                except discord.HTTPException as e:
+                    remaining = [ev for ev in events if id(ev) not in sent_ids]
+                    if e.status == 429:
+                        self.bucket.block(float(getattr(e, "retry_after", None) or self.bucket.per))
+                        self._requeue_front(remaining)
+                        break
+                    if 400 <= e.status < 500:
+                        # Missing access, unknown channel, bad payload: a retry fails the same way
+                        print(f"[LOG] dropped {len(remaining)} events, Discord rejected the send: {e}")
+                        return
+                    self._spill_unsent(remaining)
+                    return
+                except Exception as e:
+                    # Connection errors (aiohttp, OSError, timeouts): keep the batch for replay
+                    print(f"[LOG] send failed, spilling {len(events) - len(sent_ids)} events: {e!r}")
+                    self._spill_unsent([ev for ev in events if id(ev) not in sent_ids])
+                    return
+                sent_ids.update(id(ev) for ev in batch)
+
+    def _pack(self, events: List[Dict]):
+        """Yield (embeds, events) per message, grouping lines by kind within Discord limits."""
+        embeds: List[discord.Embed] = []
+        covered: List[Dict] = []
+        total = 0
+        by_kind: Dict[str, List[Dict]] = {}
+        for ev in events:
+            by_kind.setdefault(ev["kind"], []).append(ev)
+        for kind, group in by_kind.items():
+            title, color = KIND_STYLE.get(kind, (kind.title(), 0x95A5A6))
+            lines: List[str] = []
+            chunk: List[Dict] = []
+            length = 0
+            for ev in group + [None]:
+                line = ev["text"][:MAX_DESCRIPTION] if ev else ""
+                full = ev is None or length + len(line) + 1 > MAX_DESCRIPTION
+                if full and lines:
+                    desc = "\n".join(lines)
+                    if len(embeds) >= MAX_EMBEDS or total + len(desc) + len(title) > MAX_MESSAGE_CHARS:
+                        yield embeds, covered
+                        embeds, covered, total = [], [], 0
+                    embeds.append(discord.Embed(title=title, description=desc, color=color))
+                    covered.extend(chunk)
+                    total += len(desc) + len(title)
+                    lines, chunk, length = [], [], 0
+                if ev is not None:
+                    lines.append(line)
+                    chunk.append(ev)
+                    length += len(line) + 1
+        if embeds:
+            yield embeds, covered
+
+    # ===== Spill file =====
+    def _spill(self, events: List[Dict], front: bool = False):
+        """Append events to the spill file.
+
+        ``front`` is for events already taken from the queue, which are older
+        than anything on disk: they go to the head of the ``.replay`` backlog
+        so the replay keeps the original order. Only the bot loop touches
+        ``.replay``, so that path needs no lock.
+        """
+        self._backlog = True
+        try:
+            if not front:
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for ev in events:
+                        f.write(json.dumps(ev, ensure_ascii=False) + "\n")
+                return
+            replay_path = self.spill_path + ".replay"
+            rest_path = replay_path + ".tmp"
+            with open(rest_path, "w", encoding="utf-8") as out:
+                for ev in events:
+                    out.write(json.dumps(ev, ensure_ascii=False) + "\n")
+                if os.path.exists(replay_path):
+                    with open(replay_path, encoding="utf-8") as f:
+                        for line in f:
+                            out.write(line)
+            os.replace(rest_path, replay_path)
+        except OSError as e:
+            print(f"[LOG] spill failed, dropped {len(events)} events: {e}")
+
+    def _spill_unsent(self, events: List[Dict]):
+        """Spill a failed batch together with the rest of the queue, which is newer, in order."""
+        with self._lock:
+            events = events + list(self._queue)
+            self._queue.clear()
+            self._backlog = True  # events published from now on spill behind these
+        self._spill(events, front=True)
+
+    def _replay_spill(self) -> int:
+        """Requeue up to ``max_queue`` of the oldest spilled events into an empty queue; returns how many.
+
+        The spill file is moved aside to ``.replay`` (later spills start a new
+        file) and read from there until empty; lines beyond the slice are
+        written back for the next time the queue runs dry. Waiting for an empty
+        queue keeps an earlier replayed slice ahead of the next one.
+        """
+        with self._lock:
+            if self._queue:
+                return 0
+        room = self.max_queue
+        replay_path = self.spill_path + ".replay"
+        rest_path = replay_path + ".tmp"
+        events: List[Dict] = []
+        bad = 0
+        try:
+            if not os.path.exists(replay_path):
+                with self._lock:
+                    if not os.path.exists(self.spill_path):
+                        self._backlog = False
+                        return 0
+                    os.replace(self.spill_path, replay_path)
+            leftover = False
+            with open(replay_path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        bad += 1
+                    if len(events) >= room:
+                        break
+                with open(rest_path, "w", encoding="utf-8") as out:
+                    for line in f:
+                        out.write(line)
+                        leftover = True
+            if leftover:
+                os.replace(rest_path, replay_path)
+            else:
+                os.remove(rest_path)
+                os.remove(replay_path)
+        except OSError as e:
+            print(f"[LOG] could not replay spill file: {e}")
+            return 0
+        if bad:
+            print(f"[LOG] skipped {bad} unreadable spill lines")
+        self._requeue_front(events)
+        return len(events)
@@ -0,0 +1,82 @@
+import logging
+import re
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import IO, List, Optional, Tuple
+
+LEVELS = ['DEBUG', 'INFO', 'WARNING', 'ERROR']
+_LEVEL_RANK = {lvl: i for i, lvl in enumerate(LEVELS)}
+
+# Bot output is plain print() text, so classify by the markers it already uses
+_ERROR_RE = re.compile(r'\[ERROR\]|Traceback|Exception|Error:|\bfailed\b|\berror\b', re.IGNORECASE)
+_WARNING_RE = re.compile(r'\[WARN(?:ING)?\]|\bwarning\b|\bretry', re.IGNORECASE)
+_DEBUG_RE = re.compile(r'\[DEBUG\]')
+
+def detect_level(line: str) -> str:
+    """Best-effort level for one line of bot output."""
+    if _ERROR_RE.search(line):
+        return 'ERROR'
+    if _WARNING_RE.search(line):
+        return 'WARNING'
+    if _DEBUG_RE.search(line):
+        return 'DEBUG'
+    return 'INFO'
+
+def level_at_least(level: str, minimum: str) -> bool:
+    return _LEVEL_RANK.get(level, 1) >= _LEVEL_RANK.get(minimum, 0)
+
+class LogRingBuffer:
+    """Thread-safe bounded buffer; when full the oldest lines are dropped and counted."""
+
+    def __init__(self, capacity: int = 10000):
+        self._lines = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def push(self, level: str, line: str):
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self.dropped += 1
+            self._lines.append((level, line))
+
+    def drain(self, limit: int) -> Tuple[List[Tuple[str, str]], int]:
+        """Pop up to ``limit`` lines; also returns (and resets) the dropped count."""
+        with self._lock:
+            n = min(limit, len(self._lines))
+            out = [self._lines.popleft() for _ in range(n)]
+            dropped, self.dropped = self.dropped, 0
+        return out, dropped
+
+def make_file_logger(path: Path, max_bytes: int = 5 * 1024 * 1024, backups: int = 5) -> logging.Logger:
+    """Logger writing raw lines to a size-rotated file (path, path.1 ... path.N)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    logger = logging.getLogger(f'wrecksshop.{path.stem}')
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+        logger.addHandler(handler)
+    return logger
+
+class ProcessLogReader(threading.Thread):
+    """Drains a subprocess pipe off the UI thread into a ring buffer and a rotating file."""
+
+    def __init__(self, stream: IO[str], buffer: LogRingBuffer, file_logger: Optional[logging.Logger] = None):
+        super().__init__(daemon=True)
+        self.stream = stream
+        self.buffer = buffer
+        self.file_logger = file_logger
+
+    def run(self):
+        for raw in iter(self.stream.readline, ''):
+            line = raw.rstrip('\r\n')
+            if not line:
+                continue
+            level = detect_level(line)
+            self.buffer.push(level, line)
+            if self.file_logger:
+                self.file_logger.log(getattr(logging, level), line)
+        self.stream.close()
@@ -0,0 +1,104 @@
+"""Online-player tracking from RCON ``ListPlayers``.
+
+``PresenceTracker.poll_once`` asks every server who is connected, diffs the
+result against the previous poll and keeps one ``PlayerSession`` per online
+EOS ID with its join time and online seconds not yet credited. Reward cycles
+read ``online`` (or ``take_online_minutes``) instead of walking every Discord
+guild member.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from rcon_session import RconSession, parse_list_players, unique_player
+
+@dataclass
+class PlayerSession:
+    eos_id: str
+    name: str
+    server: str
+    joined_at: float = field(default_factory=time.monotonic)
+    last_seen: float = field(default_factory=time.monotonic)
+    uncredited: float = 0.0  # online seconds not yet turned into reward minutes
+
+    @property
+    def duration(self) -> float:
+        return self.last_seen - self.joined_at
+
+@dataclass
+class PresenceDiff:
+    joined: List[PlayerSession]
+    left: List[PlayerSession]
+
+class PresenceTracker:
+    def __init__(self, sessions: Dict[str, RconSession], max_gap: float = 600.0):
+        """``max_gap`` caps the seconds credited between two polls, so an outage is not paid as online time."""
+        self.sessions = sessions
+        self.max_gap = max_gap
+        self.online: Dict[str, PlayerSession] = {}
+        # Seconds earned by players who left before the next reward cycle
+        self._departed: Dict[str, Tuple[str, str, float]] = {}
+
+    async def poll_once(self) -> PresenceDiff:
+        names = list(self.sessions)
+        results = await asyncio.gather(*(asyncio.to_thread(self.sessions[n].command, 'ListPlayers') for n in names),
+                                       return_exceptions=True)
+        now = time.monotonic()
+        joined, left = [], []
+        for server, result in zip(names, results):
+            if isinstance(result, Exception):
+                # Unknown state: keep this server's players as they were, without crediting the gap
+                print(f"[RCON] ListPlayers failed on {server}: {result}")
+                for ps in self.online.values():
+                    if ps.server == server:
+                        ps.last_seen = now
+                continue
+            roster = parse_list_players(result)
+            for eos_id, name in roster.items():
+                ps = self.online.get(eos_id)
+                if ps is None or ps.server != server:
+                    if ps is not None:
+                        left.append(self._drop(eos_id))
+                    ps = self.online[eos_id] = PlayerSession(eos_id, name, server, now, now)
+                    joined.append(ps)
+                else:
+                    ps.uncredited += min(now - ps.last_seen, self.max_gap)
+                    ps.last_seen = now
+                    ps.name = name
+            for eos_id in [e for e, ps in self.online.items() if ps.server == server and e not in roster]:
+                left.append(self._drop(eos_id))
+        return PresenceDiff(joined, left)
+
+    def _drop(self, eos_id: str) -> PlayerSession:
+        ps = self.online.pop(eos_id)
+        if ps.uncredited:
+            _, _, prev = self._departed.get(eos_id, (ps.name, ps.server, 0.0))
+            self._departed[eos_id] = (ps.name, ps.server, prev + ps.uncredited)
+        return ps
+
+    def roster(self, server: str) -> Dict[str, str]:
+        """Players online on ``server`` at the last poll, as {eos_id: name}."""
+        return {ps.eos_id: ps.name for ps in self.online.values() if ps.server == server}
+
+    def find(self, server: str, name: str) -> Optional[str]:
+        """EOS ID of ``name`` on ``server`` at the last poll; None if nobody or several players use that name."""
+        return unique_player(self.roster(server), name)
+
+    def take_online_minutes(self) -> Dict[str, Tuple[str, str, int]]:
+        """Whole online minutes per player since the last call, as {eos_id: (name, server, minutes)}.
+
+        Leftover seconds carry over to the next call.
+        """
+        out: Dict[str, Tuple[str, str, int]] = {}
+        for eos_id, (name, server, seconds) in self._departed.items():
+            if int(seconds // 60):
+                out[eos_id] = (name, server, int(seconds // 60))
+        self._departed.clear()
+        for eos_id, ps in self.online.items():
+            minutes = int(ps.uncredited // 60)
+            ps.uncredited -= minutes * 60
+            if minutes:
+                prev = out.get(eos_id, (ps.name, ps.server, 0))[2]
+                out[eos_id] = (ps.name, ps.server, prev + minutes)
+        return out
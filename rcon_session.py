@@ -0,0 +1,144 @@
+import re
+import socket
+import struct
+import threading
+from typing import Dict, Optional
+
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+# ARK's reply to a command with no output
+NO_RESPONSE = 'Server received, But no response'
+_LIST_PLAYER_RE = re.compile(r'^\s*\d+\.\s*(?P<name>.+?),\s*(?P<eos>[0-9A-Za-z]+)\s*$')
+
+def parse_list_players(response: str) -> Dict[str, str]:
+    """Parse ListPlayers output ("0. Name, EOSID") into {eos_id: name}.
+
+    Keyed by EOS ID because display names are not unique.
+    """
+    players = {}
+    for line in (response or '').splitlines():
+        m = _LIST_PLAYER_RE.match(line)
+        if m:
+            players[m.group('eos')] = m.group('name').strip()
+    return players
+
+def unique_player(roster: Dict[str, str], name: str) -> Optional[str]:
+    """EOS ID of ``name`` in an {eos_id: name} roster, or None unless exactly one player has that name."""
+    matches = [eos_id for eos_id, n in roster.items() if n == name]
+    return matches[0] if len(matches) == 1 else None
+
+def pack_packet(req_id: int, ptype: int, body: str) -> bytes:
+    """Frame one Source RCON packet: little-endian size, id, type, then a null-terminated body."""
+    payload = struct.pack("<ii", req_id, ptype) + body.encode("utf8") + b"\x00\x00"
+    return struct.pack("<i", len(payload)) + payload
+
+class RconError(Exception):
+    pass
+
+class RconSession:
+    """Persistent RCON connection to one entry of RCON_SERVERS.
+
+    Pollers call ``command`` every few seconds, so the socket and login are
+    kept open and only re-established after a failure. Speaks the Source
+    RCON protocol over a plain socket with ``timeout`` applied before connect
+    and to every read, so it is safe to call from worker threads (mcrcon
+    installs a SIGALRM handler, which only works on the main thread).
+    """
+
+    def __init__(self, server: dict, timeout: float = 5.0):
+        self.name = server.get('name') or server['host']
+        self.host = server['host']
+        self.port = int(server['port'])
+        self.password = server['password']
+        self.timeout = timeout
+        self._sock = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _request_id(self) -> int:
+        self._next_id = self._next_id % 0x7FFFFFFF + 1
+        return self._next_id
+
+    def _recv_exact(self, length: int) -> bytes:
+        data = b''
+        while len(data) < length:
+            chunk = self._sock.recv(length - len(data))
+            if not chunk:
+                raise RconError(f"{self.name}: connection closed by server")
+            data += chunk
+        return data
+
+    def _read_packet(self):
+        (length,) = struct.unpack('<i', self._recv_exact(4))
+        payload = self._recv_exact(length)
+        req_id, ptype = struct.unpack('<ii', payload[:8])
+        return req_id, ptype, payload[8:-2].decode('utf8', errors='replace')
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        # Each command is two small writes (command + end probe); don't let Nagle hold the second
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        try:
+            auth_id = self._request_id()
+            sock.sendall(pack_packet(auth_id, SERVERDATA_AUTH, self.password))
+            while True:
+                req_id, ptype, _ = self._read_packet()
+                if ptype == SERVERDATA_AUTH_RESPONSE:
+                    break
+            if req_id == -1:
+                raise RconError(f"{self.name}: RCON login failed")
+        except Exception:
+            self._close()
+            raise
+
+    def _exec(self, cmd: str) -> str:
+        # Long responses arrive as several packets. An empty RESPONSE_VALUE sent right
+        # after the command is echoed back once the whole response has been sent, so
+        # its id marks the end; packets with any other id are leftovers and dropped.
+        cmd_id, probe_id = self._request_id(), self._request_id()
+        self._sock.sendall(pack_packet(cmd_id, SERVERDATA_EXECCOMMAND, cmd)
+                           + pack_packet(probe_id, SERVERDATA_RESPONSE_VALUE, ''))
+        parts = []
+        while True:
+            req_id, _, body = self._read_packet()
+            if req_id == probe_id:
+                return ''.join(parts)
+            if req_id == cmd_id:
+                parts.append(body)
+
+    def connect(self):
+        """Open and authenticate the connection now instead of on the first command."""
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+
+    def command(self, cmd: str, retry: bool = True) -> str:
+        """Run ``cmd``, reconnecting once after a failure; pass retry=False for
+        commands that must not be sent twice (e.g. giveitem)."""
+        attempts = 2 if retry else 1
+        with self._lock:
+            for attempt in range(1, attempts + 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._exec(cmd)
+                except (OSError, RconError, struct.error):
+                    self._close()
+                    if attempt == attempts:
+                        raise
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def close(self):
+        with self._lock:
+            self._close()
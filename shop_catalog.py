@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from arklib_loader import ArkItem
+import command_builders
+
+# Placeholder the bot replaces with the buyer's EOS/implant ID at purchase time
+PLAYER_PLACEHOLDER = '{implantID}'
+
+# Default price and command parameters per Data Library section.
+# A pricing_rules.json next to shop_items.json overrides these per section key.
+PRICING_RULES_PATH = 'pricing_rules.json'
+DEFAULT_PRICING_RULES: Dict[str, Dict] = {
+    'creatures': {'price': 500, 'level': 224, 'breedable': False},
+    'items': {'price': 50, 'qty': 1, 'quality': 1, 'is_bp': False},
+    'engrams': {'price': 150, 'qty': 1, 'quality': 1, 'is_bp': True},
+}
+FALLBACK_RULE = {'price': 100, 'qty': 1, 'quality': 1, 'is_bp': False}
+# Appended to blueprint entry names; the library lists many names as both item and engram
+BLUEPRINT_SUFFIX = ' (Blueprint)'
+# Name suffix when one import has the same name in several sections (the library has 'Mek' as a creature and an item)
+SECTION_LABELS = {'creatures': 'Creature', 'items': 'Item', 'engrams': 'Engram'}
+
+def load_pricing_rules(path: str = PRICING_RULES_PATH) -> Dict[str, Dict]:
+    rules = {k: dict(v) for k, v in DEFAULT_PRICING_RULES.items()}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for section, rule in json.load(f).items():
+                rules.setdefault(section.lower(), {}).update(rule)
+    return rules
+
+def load_shop_items(path: str) -> Dict[str, List[Dict]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_shop_items(store: Dict[str, List[Dict]], path: str):
+    """Write the catalog atomically: dump to a temp file in the same folder, then rename over."""
+    target = Path(path).resolve()
+    fd, tmp = tempfile.mkstemp(prefix=target.name + '.', suffix='.tmp', dir=target.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(store, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def build_command(item: ArkItem, rule: Dict) -> str:
+    if item.section.lower().startswith('creature'):
+        return command_builders.build_spawn_dino_command(
+            eos_id=PLAYER_PLACEHOLDER, item=item,
+            level=int(rule.get('level', 224)), breedable=bool(rule.get('breedable', False)))
+    return command_builders.build_giveitem_command(
+        player_id=PLAYER_PLACEHOLDER, item=item,
+        qty=int(rule.get('qty', 1)), quality=int(rule.get('quality', 1)), is_bp=bool(rule.get('is_bp', False)))
+
+def build_catalog_entries(items: Iterable[ArkItem], rules: Optional[Dict[str, Dict]] = None,
+                          roles='all', limit: bool = False) -> List[Dict]:
+    """Turn library rows into shop_items.json entries using each row's section pricing rule.
+
+    Blueprint rows get BLUEPRINT_SUFFIX on their name, so an engram never shares
+    a shop name with the item it unlocks. A name that still occurs in more than
+    one section of ``items`` gets its section label, e.g. "Mek (Creature)" and
+    "Mek (Item)", so neither row is lost.
+    """
+    rules = rules if rules is not None else load_pricing_rules()
+    named = []
+    sections: Dict[str, set] = {}
+    for item in items:
+        rule = rules.get(item.section.lower(), FALLBACK_RULE)
+        name = item.name + BLUEPRINT_SUFFIX if rule.get('is_bp') else item.name
+        named.append((item, rule, name))
+        sections.setdefault(name, set()).add(item.section.lower())
+    entries = []
+    for item, rule, name in named:
+        if len(sections[name]) > 1:
+            section = item.section.lower()
+            name = f"{name} ({SECTION_LABELS.get(section, item.section.title())})"
+        entries.append({'name': name, 'command': build_command(item, rule),
+                        'price': int(rule.get('price', FALLBACK_RULE['price'])),
+                        'limit': limit, 'roles': roles})
+    return entries
+
+def existing_names(store: Dict[str, List[Dict]], category: str, entries: List[Dict]) -> List[str]:
+    """Names in ``entries`` that the category already has, each listed once."""
+    names = {itm['name'] for itm in store.get(category, [])}
+    return list(dict.fromkeys(e['name'] for e in entries if e['name'] in names))
+
+def merge_entries(store: Dict[str, List[Dict]], category: str, entries: List[Dict],
+                  replace: bool = False) -> Tuple[int, int, int]:
+    """Add entries to a category in place. Returns (added, existing, duplicates).
+
+    Items already in the category keep their admin-edited price, roles and
+    limit unless ``replace`` is set, in which case they are overwritten.
+    ``duplicates`` counts entries skipped because an earlier entry in the same
+    call already used that name.
+    """
+    existing = store.setdefault(category, [])
+    index = {itm['name']: i for i, itm in enumerate(existing)}
+    seen = set()
+    added = matched = duplicates = 0
+    for entry in entries:
+        if entry['name'] in seen:
+            duplicates += 1
+            continue
+        seen.add(entry['name'])
+        pos = index.get(entry['name'])
+        if pos is None:
+            index[entry['name']] = len(existing)
+            existing.append(entry)
+            added += 1
+        else:
+            if replace:
+                existing[pos] = entry
+            matched += 1
+    return added, matched, duplicates
@@ -0,0 +1,114 @@
+import os
+import struct
+from command_builders import coalesce_with_sources
+from rcon_session import RconError, RconSession
+
+# RCON settings (single-server fallback; .env must be loaded before import)
+RCON_HOST = os.getenv('RCON_HOST','127.0.0.1')
+RCON_PORT = int(os.getenv('RCON_PORT',25575))
+RCON_PASSWORD = os.getenv('RCON_PASSWORD','changeme')
+
+# Open connections keyed by the "name" field of each SQL_DATABASES entry
+db_conns = {}
+# Configs registered by connect_databases; connections open on first use
+db_configs = {}
+
+def connect_databases(configs, eager=False):
+    """Register a MariaDB config per entry; with eager=True open every connection now."""
+    for cfg in configs:
+        db_configs[cfg["name"]] = cfg
+        if eager:
+            _open_connection(cfg["name"])
+    return db_conns
+
+def _open_connection(db_name):
+    import pymysql
+    cfg = db_configs[db_name]
+    db_conns[db_name] = pymysql.connect(host=cfg["host"], port=int(cfg["port"]),
+                                         user=cfg["user"], password=cfg["password"],
+                                         database=cfg["database"], autocommit=True)
+    return db_conns[db_name]
+
+# ===== Database Helpers =====
+def get_cursor(db_name="primary"):
+    conn = db_conns.get(db_name) or _open_connection(db_name)
+    return conn.cursor()
+
+def get_balance(player_id, db_name="primary"):
+    cur = get_cursor(db_name)
+    cur.execute("SELECT COALESCE(SUM(points),0) FROM transactions WHERE player_id=%s", (player_id,))
+    bal = cur.fetchone()[0]
+    cur.close()
+    return bal
+
+def log_transaction(player_id, points, status, source="shop", db_name="primary"):
+    cur = get_cursor(db_name)
+    cur.execute(
+        "INSERT INTO transactions (player_id, points, status, source) VALUES (%s,%s,%s,%s)",
+        (player_id, points, status, source)
+    )
+    cur.close()
+    return get_balance(player_id, db_name)
+
+def queue_delivery(player_id, item_name, command, map_name, price, db_name="primary"):
+    cur = get_cursor(db_name)
+    cur.execute(
+        "INSERT INTO pending_deliveries (player_id, item_name, command, map, price) VALUES (%s,%s,%s,%s,%s)",
+        (player_id, item_name, command, map_name, price)
+    )
+    cur.close()
+
+def deliver_queued_items(db_name="primary"):
+    """Send every pending delivery over one RCON connection and return the number of rows delivered.
+
+    Commands are coalesced across rows (see command_builders.coalesce_with_sources),
+    so a backlog of the same item for a player goes out as one giveitem. Sources are
+    tracked per command line: a merged command that was sent delivers every share in
+    it. A row whose lines were all sent is marked delivered; a row with some lines
+    sent keeps only its unsent lines as its pending command, so it is never resent in full.
+
+    Blocking: call it through asyncio.to_thread. If the server cannot be reached
+    (initially or after a failed command) every remaining command is left pending
+    rather than waiting out a connect timeout per command.
+    """
+    cur = get_cursor(db_name)
+    cur.execute("SELECT id, player_id, command FROM pending_deliveries WHERE status='pending' ORDER BY id")
+    rows = cur.fetchall()
+    row_lines = {id_: [l.strip() for l in (command or "").splitlines() if l.strip()] for id_, _, command in rows}
+    failed = set()  # (row id, line index) pairs whose command was not sent
+    session = RconSession({'name': 'delivery', 'host': RCON_HOST, 'port': RCON_PORT, 'password': RCON_PASSWORD})
+    sources = (((id_, idx), line) for id_, lines in row_lines.items() for idx, line in enumerate(lines))
+    connected = True
+    try:
+        session.connect()
+    except (OSError, RconError, struct.error) as e:
+        print(f"[RCON] delivery connect failed: {e}")
+        connected = False
+    for cmd, line_sources in coalesce_with_sources(sources):
+        if not connected:
+            failed.update(line_sources)
+            continue
+        try:
+            # No automatic resend: a dropped reply may still mean the items were given
+            session.command(cmd, retry=False)
+        except (OSError, RconError, struct.error):
+            failed.update(line_sources)
+            try:
+                session.connect()
+            except (OSError, RconError, struct.error) as e:
+                print(f"[RCON] delivery reconnect failed, leaving the rest queued: {e}")
+                connected = False
+    session.close()
+    delivered, partial = [], []
+    for id_, lines in row_lines.items():
+        unsent = [line for idx, line in enumerate(lines) if (id_, idx) in failed]
+        if not unsent:
+            delivered.append((id_,))
+        elif len(unsent) < len(lines):
+            partial.append(("\n".join(unsent), id_))
+    if delivered:
+        cur.executemany("UPDATE pending_deliveries SET status='delivered' WHERE id=%s", delivered)
+    if partial:
+        cur.executemany("UPDATE pending_deliveries SET command=%s WHERE id=%s", partial)
+    cur.close()
+    return len(delivered)
@@ -0,0 +1,106 @@
+"""Cold-start profiling shared by the launcher and the bot.
+
+``StartupProfiler.from_argv`` is created before any heavy import. With
+``--profile-startup`` it wraps ``__import__`` to time every first-time
+import (inclusive, like ``python -X importtime``) and records named init
+phases; ``finish()`` prints the breakdown and checks time-to-ready (or the total)
+against ``--startup-budget-ms``. Without the flag every method is a no-op.
+"""
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+PROFILE_FLAG = '--profile-startup'
+BUDGET_FLAG = '--startup-budget-ms'
+
+class StartupProfiler:
+    def __init__(self, enabled: bool = False, budget_ms: Optional[float] = None):
+        self.enabled = enabled
+        self.budget_ms = budget_ms
+        self.t0 = time.perf_counter()
+        self.imports: List[Tuple[str, int, float]] = []  # (module, depth, ms)
+        self.phases: List[Tuple[str, float]] = []
+        self.ready_ms: Optional[float] = None
+        self._depth = 0
+        self._orig_import = None
+        if enabled:
+            self._install_import_hook()
+
+    @classmethod
+    def from_argv(cls, argv: List[str]) -> 'StartupProfiler':
+        budget = None
+        if BUDGET_FLAG in argv:
+            idx = argv.index(BUDGET_FLAG)
+            budget = float(argv[idx + 1]) if idx + 1 < len(argv) else None
+        return cls(enabled=PROFILE_FLAG in argv, budget_ms=budget)
+
+    def _install_import_hook(self):
+        self._orig_import = builtins.__import__
+        orig = self._orig_import
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return orig(name, globals, locals, fromlist, level)
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return orig(name, globals, locals, fromlist, level)
+            finally:
+                self._depth -= 1
+                self.imports.append((name, self._depth, (time.perf_counter() - start) * 1000))
+
+        builtins.__import__ = timed_import
+
+    def stop_import_hook(self):
+        if self._orig_import is not None:
+            builtins.__import__ = self._orig_import
+            self._orig_import = None
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - start) * 1000))
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000
+
+    def mark_ready(self):
+        """Record the moment the app is usable; the budget is checked against this when set."""
+        if self.enabled and self.ready_ms is None:
+            self.ready_ms = self.elapsed_ms()
+
+    def report(self, total: Optional[float] = None, top: int = 15) -> str:
+        total = self.elapsed_ms() if total is None else total
+        lines = [f'Startup profile: {total:.1f} ms total']
+        if self.ready_ms is not None:
+            lines.append(f'Ready after {self.ready_ms:.1f} ms')
+        lines += ['', 'Top-level imports (inclusive ms):']
+        top_level = sorted((i for i in self.imports if i[1] == 0), key=lambda i: -i[2])
+        for name, _, ms in top_level[:top]:
+            lines.append(f'  {ms:9.1f}  {name}')
+        lines.append(f'  {sum(i[2] for i in top_level):9.1f}  (all top-level imports)')
+        lines += ['', 'Init phases (ms):']
+        for name, ms in self.phases:
+            lines.append(f'  {ms:9.1f}  {name}')
+        if self.budget_ms is not None:
+            verdict = 'OK' if self._budgeted(total) <= self.budget_ms else 'OVER BUDGET'
+            lines += ['', f'Budget {self.budget_ms:.0f} ms: {verdict}']
+        return '\n'.join(lines)
+
+    def finish(self) -> int:
+        """Print the report and return a process exit code (1 when over budget)."""
+        total = self.elapsed_ms()
+        self.stop_import_hook()
+        print(self.report(total), flush=True)
+        return 0 if self.budget_ms is None or self._budgeted(total) <= self.budget_ms else 1
+
+    def _budgeted(self, total: float) -> float:
+        return self.ready_ms if self.ready_ms is not None else total